@@ -1,16 +1,271 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from googleapiclient.discovery import build
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import seaborn as sns
+from googleapiclient.http import build_http
 import re
+import os
+import contextlib
+import queue
+import tempfile
+import threading
+import time
+from collections import Counter
+from itertools import chain
+from pathlib import Path
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait
+
+from vader_core import VaderScorer
+
+# wordcloud, plotly and numba (inside vader_core) are only needed once a
+# video is analyzed, so they are imported where they are used rather than on
+# every page load
+
+# URLs, @mentions and any punctuation other than .,!? are stripped in one pass.
+# A mention stops where a URL starts, as if URLs were still removed first.
+_CLEAN_RE = re.compile(r'http\S+|www\S+|@(?:(?!http\S|www\S)\w)+|[^\w\s.,!?@]+|@')
+# words as WordCloud splits them; cleaned tokens can still join several with .,!?
+_WORD_RE = re.compile(r"\w[\w']*")
+_PLAIN_ID_RE = re.compile(r'[a-zA-Z0-9_-]{11}')
+_VIDEO_ID_RE = re.compile(
+    r'(?:youtube\.com/(?:watch\?v=|embed/)|youtu\.be/)(?P<id>[a-zA-Z0-9_-]{11})'
+)
+
+# comments are passed around column-wise, as a dict of equal-length lists
+COMMENT_FIELDS = ['author', 'text', 'likes', 'published_at']
+SCORE_COLUMNS = ['vader_pos', 'vader_neg', 'vader_neu', 'vader_compound']
+# VADER's recommended compound cut-off for positive / negative comments
+SENTIMENT_THRESHOLD = 0.05
+SENTIMENT_LABELS = ['Negative', 'Neutral', 'Positive']
+# downloaded comments are kept on disk for a day
+CACHE_DIR = Path(__file__).parent / '.cache'
+CACHE_MAX_AGE = 24 * 60 * 60
+# videos.list accepts at most this many comma-separated IDs
+MAX_IDS_PER_REQUEST = 50
+
+
+# Streamlit re-executes this script on every rerun, so the idle HTTP
+# connections are kept here rather than at module level.
+@st.cache_resource(show_spinner=False)
+def _idle_http():
+    """Idle HTTP connections shared by all sessions' API requests."""
+    return queue.SimpleQueue()
+
+
+@contextlib.contextmanager
+def _borrowed_http():
+    # httplib2 connections are not thread-safe, so each request takes an idle
+    # one (or opens a new one) and hands it back when done; keeping them in
+    # the cached queue lets later runs, on other threads, reuse them too
+    idle = _idle_http()
+    try:
+        http = idle.get_nowait()
+    except queue.Empty:
+        http = build_http()
+    try:
+        yield http
+    finally:
+        idle.put(http)
+
 
-sns.set_style("whitegrid")
-plt.rcParams['figure.dpi'] = 100
+# ====================================================
+#   CLEANING & SCORING
+# ====================================================
+def tokenize(text):
+    return _CLEAN_RE.sub('', text).split()
+
+
+def clean_text(text):
+    return ' '.join(tokenize(text))
+
+
+# ====================================================
+#   CACHED API CALLS & ANALYSIS
+# ====================================================
+@st.cache_resource(show_spinner=False)
+def get_services(api_key):
+    """YouTube client and VADER scorer, built once and shared across reruns."""
+    youtube = build('youtube', 'v3', developerKey=api_key, cache_discovery=False)
+    vader = VaderScorer()
+    # compile the scoring loop in the background, so neither the page load
+    # nor the first analysis has to wait for Numba
+    threading.Thread(target=vader.warm_up, daemon=True).start()
+    return youtube, vader
+
+
+# These raise on API errors (which st.cache_data does not cache) and leave
+# reporting to YouTubeSentimentAnalyzer, so repeat analyses of the same
+# video skip both the API round-trips and the scoring.
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_video_infos(api_key, video_ids):
+    """Returns details keyed by video ID; IDs with no video are left out."""
+    youtube, _ = get_services(api_key)
+    video_ids = list(dict.fromkeys(video_ids))
+    infos = {}
+
+    for start in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+        request = youtube.videos().list(
+            part='snippet,statistics',
+            id=','.join(video_ids[start:start + MAX_IDS_PER_REQUEST]),
+            fields='items(id,snippet(title,channelTitle,publishedAt),'
+                   'statistics(viewCount,likeCount,commentCount))'
+        )
+        with _borrowed_http() as http:
+            response = request.execute(http=http)
+
+        for video in response.get('items', []):
+            infos[video['id']] = {
+                'title': video['snippet']['title'],
+                'channel': video['snippet']['channelTitle'],
+                'published_at': video['snippet']['publishedAt'],
+                'views': int(video['statistics'].get('viewCount', 0)),
+                'likes': int(video['statistics'].get('likeCount', 0)),
+                'comments_count': int(video['statistics'].get('commentCount', 0))
+            }
+
+    return infos
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_comments(api_key, video_id, max_comments=300, _progress=None, _cancel=None):
+    """_progress, if given, is a list the running comment count is appended to.
+
+    _cancel, if given, is a threading.Event; once it is set the download
+    raises CancelledError before its next page, so nothing partial is cached.
+    """
+    # only well-formed IDs are used in file names
+    if not _PLAIN_ID_RE.fullmatch(video_id):
+        return _download_comments(api_key, video_id, max_comments, _progress, _cancel)
+
+    path = CACHE_DIR / f'{video_id}_{max_comments}.parquet'
+    if path.exists() and time.time() - path.stat().st_mtime < CACHE_MAX_AGE:
+        try:
+            return pd.read_parquet(path).to_dict('list')
+        except (OSError, pa.ArrowException):
+            # an unreadable file counts as a miss and is replaced below
+            with contextlib.suppress(OSError):
+                path.unlink()
+
+    comments = _download_comments(api_key, video_id, max_comments, _progress, _cancel)
+    # an empty result is not kept, so comments posted later show up next time
+    if comments['text']:
+        try:
+            _write_cache(path, comments)
+        except (OSError, pa.ArrowException):
+            pass  # the disk cache is best-effort
+    return comments
+
+
+def _write_cache(path, comments):
+    # write next to the target and rename, so a failed write never leaves a
+    # truncated file behind under the real name
+    CACHE_DIR.mkdir(exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pd.DataFrame(comments).to_parquet(f, compression='zstd')
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    # drop entries (and temp files of interrupted writes) past their age
+    cutoff = time.time() - CACHE_MAX_AGE
+    for old in chain(CACHE_DIR.glob('*.parquet'), CACHE_DIR.glob('*.tmp')):
+        with contextlib.suppress(OSError):
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+
+
+def _download_comments(api_key, video_id, max_comments, progress=None, cancel=None):
+    youtube, _ = get_services(api_key)
+    authors, texts, likes, published = [], [], [], []
+    next_page_token = None
+
+    while len(texts) < max_comments:
+        if cancel is not None and cancel.is_set():
+            raise CancelledError()
+        request = youtube.commentThreads().list(
+            part='snippet',
+            videoId=video_id,
+            maxResults=min(100, max_comments - len(texts)),
+            pageToken=next_page_token,
+            textFormat='plainText',
+            fields='items(snippet/topLevelComment/snippet(authorDisplayName,'
+                   'textDisplay,likeCount,publishedAt)),nextPageToken'
+        )
+        with _borrowed_http() as http:
+            response = request.execute(http=http)
+
+        for item in response.get('items', []):
+            c = item['snippet']['topLevelComment']['snippet']
+            authors.append(c['authorDisplayName'])
+            texts.append(c['textDisplay'])
+            likes.append(c['likeCount'])
+            published.append(c['publishedAt'])
+        if progress is not None:
+            progress.append(len(texts))
+
+        next_page_token = response.get('nextPageToken')
+        if not next_page_token:
+            break
+
+    return dict(zip(COMMENT_FIELDS, (authors, texts, likes, published)))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def analyze_comments(comments, _vader):
+    """Returns the results frame and the word counts for the word cloud.
+
+    Each comment is cleaned and split once; the token lists then feed the
+    length filter, the VADER scorer and the word counts.
+    """
+    tokens = [tokenize(str(text)) for text in comments['text']]
+    tokens = [words for words in tokens if len(words) >= 2]
+
+    scores = _vader.score_tokens(tokens)
+    compound = scores[:, SCORE_COLUMNS.index('vader_compound')]
+    labels = np.select(
+        [compound >= SENTIMENT_THRESHOLD, compound <= -SENTIMENT_THRESHOLD],
+        [SENTIMENT_LABELS.index('Positive'), SENTIMENT_LABELS.index('Negative')],
+        default=SENTIMENT_LABELS.index('Neutral')
+    ).astype(np.int8)
+
+    # scores lie in [-1, 1] and are rounded to 4 digits, so float32 loses nothing shown
+    df = pd.DataFrame({
+        'comment': pd.Series([' '.join(words) for words in tokens], dtype=str),
+        **dict(zip(SCORE_COLUMNS, scores.astype(np.float32).T)),
+        'vader_sentiment': pd.Categorical.from_codes(labels, categories=SENTIMENT_LABELS)
+    })
+    return df, word_frequencies(tokens)
+
+
+def word_frequencies(tokens, max_words=200):
+    """Counts of the most common words, lower-cased, without stopwords or plurals."""
+    from wordcloud import STOPWORDS
+
+    counts = Counter(
+        w.lower() for token in chain.from_iterable(tokens) for w in _WORD_RE.findall(token)
+    )
+    counts = Counter({
+        w: n for w, n in counts.items()
+        if w not in STOPWORDS and not w.isdigit()
+    })
+    # fold plurals into their singular, as WordCloud's normalize_plurals does
+    for w in list(counts):
+        if w.endswith('s') and not w.endswith('ss') and w[:-1] in counts:
+            counts[w[:-1]] += counts.pop(w)
+    return dict(counts.most_common(max_words))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def to_csv_bytes(df):
+    """Results as UTF-8 CSV, written by pyarrow rather than pandas' slower writer."""
+    buf = pa.BufferOutputStream()
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    return buf.getvalue().to_pybytes()
 
 
 # ====================================================
@@ -20,118 +275,124 @@ class YouTubeSentimentAnalyzer:
     def __init__(self, api_key):
         self.api_key = api_key
         try:
-            self.youtube = build('youtube', 'v3', developerKey=api_key)
+            self.youtube, self.vader = get_services(api_key)
         except Exception as e:
             st.error(f"❌ Failed to initialize YouTube API: {e}")
-        self.vader = SentimentIntensityAnalyzer()
+            st.stop()
         self.comments_df = None
+        self.word_freqs = None
+        self._comments_progress = []
+        self._comments_cancel = threading.Event()
         self.video_info = None
 
     def extract_video_id(self, url):
-        patterns = [
-            r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/watch\?v=([a-zA-Z0-9_-]{11})',
-            r'(?:https?:\/\/)?(?:www\.)?youtu\.be\/([a-zA-Z0-9_-]{11})',
-            r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/embed\/([a-zA-Z0-9_-]{11})',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
+        match = _VIDEO_ID_RE.search(url)
+        if match:
+            return match.group('id')
         return url  # assume it's a pure video ID
 
+    def get_video_infos(self, video_ids):
+        try:
+            return fetch_video_infos(self.api_key, list(video_ids))
+        except Exception as e:
+            st.error(f"❌ YouTube API Error (video info): {e}")
+            return {}
+
     def get_video_info(self, video_id):
         try:
-            request = self.youtube.videos().list(
-                part='snippet,statistics',
-                id=video_id
-            )
-            response = request.execute()
+            video_info = fetch_video_infos(self.api_key, [video_id]).get(video_id)
         except Exception as e:
             st.error(f"❌ YouTube API Error (video info): {e}")
             return None
 
-        if not response.get("items"):
+        if video_info is None:
             st.error("❌ No video found with this ID.")
             return None
 
-        video = response['items'][0]
-
-        self.video_info = {
-            'title': video['snippet']['title'],
-            'channel': video['snippet']['channelTitle'],
-            'published_at': video['snippet']['publishedAt'],
-            'views': int(video['statistics'].get('viewCount', 0)),
-            'likes': int(video['statistics'].get('likeCount', 0)),
-            'comments_count': int(video['statistics'].get('commentCount', 0))
-        }
+        self.video_info = video_info
         return self.video_info
 
-    def get_comments(self, video_id, max_comments=300):
-        comments = []
-        next_page_token = None
-
-        while len(comments) < max_comments:
-            try:
-                request = self.youtube.commentThreads().list(
-                    part='snippet',
-                    videoId=video_id,
-                    maxResults=min(100, max_comments - len(comments)),
-                    pageToken=next_page_token,
-                    textFormat='plainText'
-                )
-                response = request.execute()
-
-            except Exception as e:
-                st.error(f"❌ YouTube API Error (comments): {e}")
-                return []
-
-            for item in response.get('items', []):
-                c = item['snippet']['topLevelComment']['snippet']
-                comments.append({
-                    'author': c['authorDisplayName'],
-                    'text': c['textDisplay'],
-                    'likes': c['likeCount'],
-                    'published_at': c['publishedAt']
-                })
-
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
-                break
-
-        return comments
+    def prefetch_comments(self, video_id, max_comments=300):
+        """Start downloading comments in the background.
+
+        Pass the returned future to get_comments() to collect the result,
+        or call cancel_prefetch() if it is no longer needed.
+        """
+        self._comments_progress = []
+        self._comments_cancel = threading.Event()
+        # a thread of its own per analysis, so one session's download never
+        # waits on another's; the executor exits once the download is done
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = executor.submit(
+            fetch_comments, self.api_key, video_id, max_comments,
+            self._comments_progress, self._comments_cancel
+        )
+        executor.shutdown(wait=False)
+        return pending
+
+    def cancel_prefetch(self):
+        # the download is already running, so Future.cancel() would not stop it
+        self._comments_cancel.set()
+
+    def get_comments(self, video_id, max_comments=300, pending=None):
+        try:
+            if pending is not None:
+                self._show_progress(pending, max_comments)
+                return pending.result()
+            return fetch_comments(self.api_key, video_id, max_comments)
+        except Exception as e:
+            st.error(f"❌ YouTube API Error (comments): {e}")
+            return {field: [] for field in COMMENT_FIELDS}
+
+    def _show_progress(self, pending, max_comments):
+        # commentCount also counts replies, so this is only an upper bound
+        expected = max_comments
+        if self.video_info:
+            expected = max(1, min(max_comments, self.video_info['comments_count']))
+
+        bar = None
+        while not pending.done():
+            if self._comments_progress:
+                fetched = self._comments_progress[-1]
+                if bar is None:
+                    bar = st.progress(0.0)
+                bar.progress(min(fetched / expected, 1.0), text=f"{fetched} comments")
+            wait([pending], timeout=0.2)
+        if bar is not None:
+            bar.empty()
 
     def clean_text(self, text):
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-        text = re.sub(r'@\w+', '', text)
-        text = re.sub(r'[^\w\s.,!?]', '', text)
-        return ' '.join(text.split())
+        return clean_text(text)
 
     def analyze(self, comments):
-        data = []
-
-        for comment in comments:
-            cleaned = self.clean_text(comment['text'])
-            if len(cleaned.split()) < 2:
-                continue
-
-            blob = TextBlob(cleaned)
-            vader = self.vader.polarity_scores(cleaned)
-
-            data.append({
-                'comment': cleaned,
-                'polarity': blob.sentiment.polarity,
-                'subjectivity': blob.sentiment.subjectivity,
-                'vader_pos': vader['pos'],
-                'vader_neg': vader['neg'],
-                'vader_neu': vader['neu'],
-                'vader_compound': vader['compound']
-            })
-
-        df = pd.DataFrame(data)
+        df, self.word_freqs = analyze_comments(comments, self.vader)
         self.comments_df = df
         return df
 
 
+# ====================================================
+#   CHARTS
+# ====================================================
+# Cached so reruns with the same results skip re-rendering; plotly figures
+# are drawn in the browser rather than rasterised on the server.
+@st.cache_data(ttl=3600, show_spinner=False)
+def wordcloud_image(freqs):
+    from wordcloud import WordCloud
+
+    return WordCloud(width=800, height=400).generate_from_frequencies(freqs).to_array()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def hist_fig(scores):
+    import plotly.graph_objects as go
+
+    # bin on the server so only the 20 bar heights are sent to the browser
+    counts, edges = np.histogram(scores, bins=20)
+    fig = go.Figure(go.Bar(x=edges[:-1], y=counts, width=np.diff(edges), offset=0))
+    fig.update_layout(xaxis_title='vader_compound', yaxis_title='count', bargap=0)
+    return fig
+
+
 # ====================================================
 #   STREAMLIT APP
 # ====================================================
@@ -157,11 +418,15 @@ def main():
         # Extract Video ID
         video_id = analyzer.extract_video_id(url)
 
+        # Start downloading comments while the video details are fetched
+        pending_comments = analyzer.prefetch_comments(video_id)
+
         # Fetch Video Info
         with st.spinner("📌 Fetching video details..."):
             video_info = analyzer.get_video_info(video_id)
 
         if not video_info:
+            analyzer.cancel_prefetch()
             return
 
         st.subheader("🎥 Video Information")
@@ -169,13 +434,13 @@ def main():
 
         # Fetch Comments
         with st.spinner("💬 Fetching comments..."):
-            comments = analyzer.get_comments(video_id)
+            comments = analyzer.get_comments(video_id, pending=pending_comments)
 
-        if len(comments) == 0:
+        if len(comments['text']) == 0:
             st.error("❌ No comments found or API blocked the request.")
             return
 
-        st.success(f"✔ Retrieved {len(comments)} comments.")
+        st.success(f"✔ Retrieved {len(comments['text'])} comments.")
 
         # Sentiment Analysis
         with st.spinner("🧠 Running sentiment analysis..."):
@@ -188,26 +453,18 @@ def main():
         # Word Cloud
         # ============================
         st.subheader("☁️ Word Cloud of Comments")
-        all_text = " ".join(df['comment'])
-        wc = WordCloud(width=800, height=400).generate(all_text)
-
-        fig, ax = plt.subplots()
-        ax.imshow(wc, interpolation="bilinear")
-        ax.axis("off")
-        st.pyplot(fig)
+        st.image(wordcloud_image(analyzer.word_freqs))
 
         # ============================
         # Sentiment Histogram
         # ============================
         st.subheader("📈 Sentiment Distribution (Compound Score)")
-        fig2, ax2 = plt.subplots()
-        sns.histplot(df['vader_compound'], bins=20, ax=ax2)
-        st.pyplot(fig2)
+        st.plotly_chart(hist_fig(df['vader_compound'].to_numpy()))
 
         # ============================
         # Download Results
         # ============================
-        csv = df.to_csv(index=False).encode("utf-8")
+        csv = to_csv_bytes(df)
         st.download_button("⬇ Download Sentiment Data (CSV)", csv, "sentiment_results.csv", "text/csv")
 
 
@@ -0,0 +1,59 @@
+"""
+Checks that vader_core.VaderScorer still matches vaderSentiment.
+
+VaderScorer re-implements the rules of vaderSentiment 3.3.2's
+polarity_scores() and imports its tables, so any upstream change has to be
+re-checked. This scores randomly built comments both ways and reports every
+mismatch:
+
+    python check_vader_parity.py [n_texts] [seed]
+"""
+import random
+import sys
+
+from vaderSentiment.vaderSentiment import BOOSTER_DICT, NEGATE, SPECIAL_CASES, SentimentIntensityAnalyzer
+
+from vader_core import VaderScorer
+
+KEYS = ['pos', 'neg', 'neu', 'compound']
+
+
+def random_texts(analyzer, n, rng):
+    lexicon = list(analyzer.lexicon)
+    emojis = [e for e in analyzer.emojis if len(e) == 1]
+    idiom_words = [w for phrase in list(SPECIAL_CASES) + list(BOOSTER_DICT) for w in phrase.split()]
+    rule_words = ['no', 'or', 'nor', 'never', 'so', 'this', 'without', 'doubt',
+                  'least', 'at', 'very', 'but', 'BUT', 'kind', 'of', "isn't"]
+    pools = [lexicon, idiom_words, rule_words, list(NEGATE), list(BOOSTER_DICT),
+             emojis, ['!', '?', '!!', '??', '...', ',', 'lol', 'video', '123']]
+
+    for _ in range(n):
+        words = []
+        for _ in range(rng.randint(0, 15)):
+            word = rng.choice(rng.choice(pools))
+            if rng.random() < 0.1:
+                word = word.upper()
+            if rng.random() < 0.1:
+                word += rng.choice('!?.,')
+            words.append(word)
+        yield ' '.join(words)
+
+
+def main(n=50000, seed=0):
+    analyzer = SentimentIntensityAnalyzer()
+    texts = list(random_texts(analyzer, n, random.Random(seed)))
+    scores = VaderScorer(analyzer).score(texts)
+
+    mismatches = 0
+    for text, row in zip(texts, scores.tolist()):
+        expected = analyzer.polarity_scores(text)
+        if row != [expected[k] for k in KEYS]:
+            mismatches += 1
+            print(f"{text!r}: {row} != {expected}")
+
+    print(f"{mismatches} mismatches in {len(texts)} texts")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*map(int, sys.argv[1:3])))
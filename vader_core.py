@@ -0,0 +1,324 @@
+"""
+Batch VADER scoring with the per-token arithmetic compiled by Numba.
+
+VaderScorer.score() returns the same numbers as calling
+SentimentIntensityAnalyzer.polarity_scores() on every text. The string work
+(splitting, lower-casing and lexicon lookups) stays in Python and leaves one
+flat array per token feature. The valence rules, the "but" adjustment and
+the normalisation are then run over the whole batch in a single JIT-compiled
+loop.
+
+Numba is only imported, and the loop compiled (or loaded from its on-disk
+cache), the first time a batch is scored or warm_up() is called.
+"""
+import math
+import string
+import threading
+
+import numpy as np
+from vaderSentiment.vaderSentiment import (
+    BOOSTER_DICT, C_INCR, N_SCALAR, NEGATE, SPECIAL_CASES, SentimentIntensityAnalyzer
+)
+
+# codes for the few words VADER's rules compare tokens against
+_OTHER, _NO, _OR_NOR, _NEVER, _SO_THIS, _WITHOUT, _DOUBT, _LEAST, _AT_VERY, _BUT = range(10)
+_WORD_CODES = {
+    'no': _NO, 'or': _OR_NOR, 'nor': _OR_NOR, 'never': _NEVER,
+    'so': _SO_THIS, 'this': _SO_THIS, 'without': _WITHOUT, 'doubt': _DOUBT,
+    'least': _LEAST, 'at': _AT_VERY, 'very': _AT_VERY, 'but': _BUT,
+}
+_NEGATE = frozenset(NEGATE)
+# words that can start or take part in a multi-word idiom / booster phrase
+_IDIOM_WORDS = frozenset(
+    w for phrase in list(SPECIAL_CASES) + list(BOOSTER_DICT) if ' ' in phrase
+    for w in phrase.split()
+)
+
+
+def _strip_punc_if_word(token):
+    stripped = token.strip(string.punctuation)
+    if len(stripped) <= 2:
+        return token
+    return stripped
+
+
+def _punctuation_emphasis(text):
+    ep_count = min(text.count('!'), 4)
+    qm_count = text.count('?')
+    qm_amplifier = 0
+    if qm_count > 1:
+        qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+    return ep_count * 0.292 + qm_amplifier
+
+
+def _idiom_valence(lower, i):
+    """Valence override and booster offset from VADER's _special_idioms_check."""
+    onezero = f"{lower[i - 1]} {lower[i]}"
+    twoonezero = f"{lower[i - 2]} {lower[i - 1]} {lower[i]}"
+    twoone = f"{lower[i - 2]} {lower[i - 1]}"
+    threetwoone = f"{lower[i - 3]} {lower[i - 2]} {lower[i - 1]}"
+    threetwo = f"{lower[i - 3]} {lower[i - 2]}"
+
+    override = math.nan
+    for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+        if seq in SPECIAL_CASES:
+            override = SPECIAL_CASES[seq]
+            break
+    if len(lower) - 1 > i:
+        zeroone = f"{lower[i]} {lower[i + 1]}"
+        if zeroone in SPECIAL_CASES:
+            override = SPECIAL_CASES[zeroone]
+    if len(lower) - 1 > i + 1:
+        zeroonetwo = f"{lower[i]} {lower[i + 1]} {lower[i + 2]}"
+        if zeroonetwo in SPECIAL_CASES:
+            override = SPECIAL_CASES[zeroonetwo]
+
+    boost = 0.0
+    for n_gram in (threetwoone, threetwo, twoone):
+        if n_gram in BOOSTER_DICT:
+            boost = boost + BOOSTER_DICT[n_gram]
+    return override, boost
+
+
+def _score_kernel(offsets, lex_idx, valence_table, skip, is_upper, booster,
+                  negated, code, idiom_val, idiom_boost, cap_diff, punct_amp):
+    n_docs = offsets.shape[0] - 1
+    out = np.zeros((n_docs, 4))
+
+    for d in range(n_docs):
+        start = offsets[d]
+        n = offsets[d + 1] - start
+        if n == 0:
+            continue
+
+        sentiments = np.zeros(n)
+        but_i = -1
+        for i in range(n):
+            t = start + i
+            if code[t] == _BUT and but_i < 0:
+                but_i = i
+            if skip[t] or lex_idx[t] < 0:
+                continue
+
+            valence = valence_table[lex_idx[t]]
+            if code[t] == _NO and i != n - 1 and lex_idx[t + 1] >= 0:
+                valence = 0.0
+            if (i > 0 and code[t - 1] == _NO) \
+                    or (i > 1 and code[t - 2] == _NO) \
+                    or (i > 2 and code[t - 3] == _NO and code[t - 1] == _OR_NOR):
+                valence = valence_table[lex_idx[t]] * N_SCALAR
+
+            if is_upper[t] and cap_diff[d]:
+                if valence > 0:
+                    valence += C_INCR
+                else:
+                    valence -= C_INCR
+
+            for start_i in range(3):
+                j = t - (start_i + 1)
+                if i <= start_i or lex_idx[j] >= 0:
+                    continue
+
+                s = 0.0
+                if booster[j] != 0.0:
+                    s = booster[j]
+                    if valence < 0:
+                        s *= -1
+                    if is_upper[j] and cap_diff[d]:
+                        if valence > 0:
+                            s += C_INCR
+                        else:
+                            s -= C_INCR
+                if start_i == 1 and s != 0:
+                    s = s * 0.95
+                if start_i == 2 and s != 0:
+                    s = s * 0.9
+                valence = valence + s
+
+                if start_i == 0:
+                    if negated[t - 1]:
+                        valence = valence * N_SCALAR
+                elif start_i == 1:
+                    if code[t - 2] == _NEVER and code[t - 1] == _SO_THIS:
+                        valence = valence * 1.25
+                    elif code[t - 2] == _WITHOUT and code[t - 1] == _DOUBT:
+                        pass
+                    elif negated[t - 2]:
+                        valence = valence * N_SCALAR
+                else:
+                    if (code[t - 3] == _NEVER and code[t - 2] == _SO_THIS) \
+                            or code[t - 1] == _SO_THIS:
+                        valence = valence * 1.25
+                    elif code[t - 3] == _WITHOUT \
+                            and (code[t - 2] == _DOUBT or code[t - 1] == _DOUBT):
+                        pass
+                    elif negated[t - 3]:
+                        valence = valence * N_SCALAR
+
+                    if not np.isnan(idiom_val[t]):
+                        valence = idiom_val[t]
+                    valence = valence + idiom_boost[t]
+
+            if i > 0 and lex_idx[t - 1] < 0 and code[t - 1] == _LEAST:
+                if i == 1 or code[t - 2] != _AT_VERY:
+                    valence = valence * N_SCALAR
+
+            sentiments[i] = valence
+
+        # mirrors VADER's _but_check, including its use of list.index()
+        if but_i >= 0:
+            for k in range(n):
+                v = sentiments[k]
+                si = 0
+                while sentiments[si] != v:
+                    si += 1
+                if si < but_i:
+                    sentiments[si] = v * 0.5
+                elif si > but_i:
+                    sentiments[si] = v * 1.5
+
+        sum_s = 0.0
+        pos_sum = 0.0
+        neg_sum = 0.0
+        neu_count = 0
+        for k in range(n):
+            v = sentiments[k]
+            sum_s += v
+            if v > 0:
+                pos_sum += v + 1
+            if v < 0:
+                neg_sum += v - 1
+            if v == 0:
+                neu_count += 1
+
+        amp = punct_amp[d]
+        if sum_s > 0:
+            sum_s += amp
+        elif sum_s < 0:
+            sum_s -= amp
+        compound = sum_s / math.sqrt(sum_s * sum_s + 15)
+        compound = min(max(compound, -1.0), 1.0)
+
+        if pos_sum > math.fabs(neg_sum):
+            pos_sum += amp
+        elif pos_sum < math.fabs(neg_sum):
+            neg_sum -= amp
+        total = pos_sum + math.fabs(neg_sum) + neu_count
+
+        out[d, 0] = math.fabs(pos_sum / total)
+        out[d, 1] = math.fabs(neg_sum / total)
+        out[d, 2] = math.fabs(neu_count / total)
+        out[d, 3] = compound
+
+    return out
+
+
+_compiled = None
+_compile_lock = threading.Lock()
+
+
+def _kernel():
+    """_score_kernel compiled by Numba; built on first use."""
+    global _compiled
+    with _compile_lock:
+        if _compiled is None:
+            from numba import njit
+            _compiled = njit(cache=True)(_score_kernel)
+    return _compiled
+
+
+class VaderScorer:
+    """Scores texts in batches with the lexicon of a SentimentIntensityAnalyzer."""
+
+    def __init__(self, analyzer=None):
+        if analyzer is None:
+            analyzer = SentimentIntensityAnalyzer()
+        lexicon = analyzer.lexicon
+        self._lex_index = {word: i for i, word in enumerate(lexicon)}
+        self._valence = np.fromiter(lexicon.values(), dtype=np.float64, count=len(lexicon))
+        # polarity_scores() swaps emoji for their descriptions one character
+        # at a time, so only single-character keys can ever match
+        self._emojis = analyzer.emojis
+        self._emoji_chars = frozenset(e for e in analyzer.emojis if len(e) == 1)
+
+    def _replace_emoji(self, text):
+        out = []
+        prev_space = True
+        for ch in text:
+            if ch in self._emojis:
+                if not prev_space:
+                    out.append(' ')
+                out.append(self._emojis[ch])
+                prev_space = False
+            else:
+                out.append(ch)
+                prev_space = ch == ' '
+        return ''.join(out)
+
+    def warm_up(self):
+        """Compiles the scoring loop now rather than on the first real batch."""
+        self.score_tokens([['good', 'video']])
+
+    def score(self, texts):
+        """Returns an (n, 4) array of pos, neg, neu and compound scores."""
+        return self.score_tokens([text.split() for text in texts])
+
+    def score_tokens(self, token_lists):
+        """Like score(), for texts already split on whitespace."""
+        lex_index = self._lex_index
+        offsets = [0]
+        lex_idx, skip, is_upper, booster, negated, code = [], [], [], [], [], []
+        idiom_val, idiom_boost, cap_diff, punct_amp = [], [], [], []
+
+        for tokens in token_lists:
+            text = ' '.join(tokens)
+            if not self._emoji_chars.isdisjoint(text):
+                # descriptions such as 'UP! button' count towards the emphasis too
+                text = self._replace_emoji(text)
+                tokens = text.split()
+            words = [_strip_punc_if_word(w) for w in tokens]
+            lower = [w.lower() for w in words]
+            upper = [w.isupper() for w in words]
+            n = len(words)
+
+            allcaps = sum(upper)
+            cap_diff.append(0 < n - allcaps < n)
+            punct_amp.append(_punctuation_emphasis(text))
+
+            has_idioms = n > 3 and not _IDIOM_WORDS.isdisjoint(lower)
+            for i, w in enumerate(lower):
+                lex_idx.append(lex_index.get(w, -1))
+                skip.append(w in BOOSTER_DICT
+                            or (w == 'kind' and i < n - 1 and lower[i + 1] == 'of'))
+                booster.append(BOOSTER_DICT.get(w, 0.0))
+                negated.append(w in _NEGATE or "n't" in w)
+                code.append(_WORD_CODES.get(w, _OTHER))
+                if has_idioms and i > 2:
+                    override, boost = _idiom_valence(lower, i)
+                else:
+                    override, boost = math.nan, 0.0
+                idiom_val.append(override)
+                idiom_boost.append(boost)
+            is_upper.extend(upper)
+            offsets.append(offsets[-1] + n)
+
+        raw = _kernel()(
+            np.array(offsets, dtype=np.int64),
+            np.array(lex_idx, dtype=np.int64),
+            self._valence,
+            np.array(skip, dtype=np.bool_),
+            np.array(is_upper, dtype=np.bool_),
+            np.array(booster, dtype=np.float64),
+            np.array(negated, dtype=np.bool_),
+            np.array(code, dtype=np.int8),
+            np.array(idiom_val, dtype=np.float64),
+            np.array(idiom_boost, dtype=np.float64),
+            np.array(cap_diff, dtype=np.bool_),
+            np.array(punct_amp, dtype=np.float64),
+        )
+        # round like polarity_scores() does
+        return np.array(
+            [[round(pos, 3), round(neg, 3), round(neu, 3), round(compound, 4)]
+             for pos, neg, neu, compound in raw.tolist()],
+            dtype=np.float64
+        ).reshape(-1, 4)